@@ -22,7 +22,7 @@ required by the database schema, but the loader will add it for
 reference if present in the path.
 
 Usage:
-    python scripts/denials_db_loader.py [--input-dir DIR] [--db-path PATH]
+    python scripts/denials_db_loader.py [--input-dir DIR] [--db-path PATH] [--workers N]
 
 The default input directory is `test_data/835_denials` relative to the
 workspace root; the default database name is `denials_engine.db` in the
@@ -35,9 +35,12 @@ in a text editor or translate parts of it manually if needed.
 """
 
 import argparse
+import itertools
+import operator
 import os
 import re
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # ---------------------------------------------------------------------------
@@ -59,6 +62,29 @@ CREATE TABLE IF NOT EXISTS Claims_Denials (
 );
 """
 
+# columns filled by parse_835_file, in the order used for bulk inserts
+CLAIM_COLUMNS = (
+    "Claim_ID", "Status", "Balance_Amount", "Payer_ID", "CPT_Code",
+    "CARC_Code", "RARC_Code", "Denial_Date", "Practice_Type",
+)
+INSERT_CLAIM_SQL = (
+    f"INSERT OR REPLACE INTO Claims_Denials ({','.join(CLAIM_COLUMNS)}) "
+    f"VALUES ({','.join('?' * len(CLAIM_COLUMNS))})"
+)
+_claim_values = operator.itemgetter(*CLAIM_COLUMNS)
+
+# first CPT CREATE TABLE in cpt_denial_intelligence.sql, rewritten to
+# IF NOT EXISTS when the table is already present
+CPT_CREATE_RE = re.compile(r"CREATE\s+TABLE\s+CPT_Denial_Intelligence", re.IGNORECASE)
+
+# 835 segment tags that parse_835_file extracts data from, mapped to the
+# maxsplit that reaches the last element it reads; every other segment
+# (ISA, GS, ST, BPR, NM1, ...) is skipped before being split
+PARSED_SEGMENTS = {"N1": 3, "CLP": 4, "CAS": 3, "SVC": 2, "DTM": 3}
+# DTM qualifiers recorded as the denial date (232/233: claim statement
+# period start/end)
+DENIAL_DATE_QUALIFIERS = frozenset(("232", "233"))
+
 # ---------------------------------------------------------------------------
 # utility helpers
 # ---------------------------------------------------------------------------
@@ -112,8 +138,8 @@ def execute_file_sql(conn, sql_path):
         # after we've potentially stripped the CARC portion above.
         if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='CPT_Denial_Intelligence'").fetchone():
             # case-insensitive replace of the first occurrence
-            content = re.sub(r"(?i)CREATE\s+TABLE\s+CPT_Denial_Intelligence", 
-                             "CREATE TABLE IF NOT EXISTS CPT_Denial_Intelligence", content, count=1)
+            content = CPT_CREATE_RE.sub(
+                "CREATE TABLE IF NOT EXISTS CPT_Denial_Intelligence", content, count=1)
             print(f"[INFO] modified CPT create to IF NOT EXISTS to avoid error")
 
         # drop view definitions as before
@@ -138,80 +164,113 @@ def execute_file_sql(conn, sql_path):
             pass
 
 
+def iter_segments(fh, block_size=1 << 16):
+    """Yield the ``~``-terminated segments of an open EDI file.
+
+    The file is read in fixed-size blocks, so memory is bounded by the block
+    size plus the longest segment, whether the file holds one segment per
+    line or is a single line.  Newlines are ignored, which matches reading
+    the whole file and stripping every "\\n" before splitting.
+    """
+    # pieces of the unterminated segment, joined once its "~" arrives
+    pending = []
+    for block in iter(lambda: fh.read(block_size), ""):
+        block = block.replace("\n", "")
+        if "~" not in block:
+            pending.append(block)
+            continue
+        pieces = block.split("~")
+        pending.append(pieces[0])
+        yield "".join(pending)
+        yield from pieces[1:-1]
+        pending = [pieces[-1]]
+    yield "".join(pending)
+
+
 def parse_835_file(filepath, practice_type=None):
     """Parse an EDI 835 file and return a list of denial dicts."""
-    with open(filepath, "r", encoding="utf-8", errors="replace") as fh:
-        raw = fh.read().replace("\n", "")  # EDI may use tilde as terminator
-    segments = raw.split("~")
     current = None
     payer = None
     results = []
 
-    for seg in segments:
-        parts = seg.split("*")
-        if not parts or not parts[0]:
-            continue
-        tag = parts[0]
-        if tag == "N1" and len(parts) > 2 and parts[1] == "PR":
-            payer = parts[2]
-        elif tag == "CLP":
-            # flush previous
-            if current:
-                results.append(current)
-            current = {
-                "Claim_ID": parts[1] if len(parts) > 1 else "",
-                "Status": parts[2] if len(parts) > 2 else "",
-                "Balance_Amount": float(parts[3]) if len(parts) > 3 and parts[3] else 0.0,
-                "Payer_ID": payer or "",
-                "CPT_Code": "",
-                "CARC_Code": "",
-                "RARC_Code": "",
-                "Denial_Date": "",
-                "Practice_Type": practice_type or "",
-            }
-        elif tag == "CAS" and current:
-            # CAS*<group>*<code>*<amt>*<qty>
-            if len(parts) >= 3:
-                code = parts[2]
-                # assume first CAS is CARC; subsequent may be RARC
-                if not current.get("CARC_Code"):
-                    current["CARC_Code"] = code
-                elif not current.get("RARC_Code"):
-                    current["RARC_Code"] = code
-        elif tag == "SVC" and current:
-            # SVC*HC:<CPT>...
-            if len(parts) > 1 and parts[1].startswith("HC:"):
-                cpt = parts[1].split(":")[1]
-                if not current.get("CPT_Code"):
-                    current["CPT_Code"] = cpt
-        elif tag == "DTM" and current:
-            # record denial date from common qualifiers
-            if len(parts) >= 3 and parts[1] in ("232", "233"):
-                current["Denial_Date"] = parts[2]
+    with open(filepath, "r", encoding="utf-8", errors="replace") as fh:
+        for seg in iter_segments(fh):
+            tag = seg.partition("*")[0]
+            maxsplit = PARSED_SEGMENTS.get(tag)
+            if maxsplit is None:
+                continue
+            parts = seg.split("*", maxsplit)
+            if tag == "N1" and len(parts) > 2 and parts[1] == "PR":
+                payer = parts[2]
+            elif tag == "CLP":
+                # flush previous
+                if current:
+                    results.append(current)
+                current = {
+                    "Claim_ID": parts[1] if len(parts) > 1 else "",
+                    "Status": parts[2] if len(parts) > 2 else "",
+                    "Balance_Amount": float(parts[3]) if len(parts) > 3 and parts[3] else 0.0,
+                    "Payer_ID": payer or "",
+                    "CPT_Code": "",
+                    "CARC_Code": "",
+                    "RARC_Code": "",
+                    "Denial_Date": "",
+                    "Practice_Type": practice_type or "",
+                }
+            elif tag == "CAS" and current:
+                # CAS*<group>*<code>*<amt>*<qty>
+                if len(parts) >= 3:
+                    code = parts[2]
+                    # assume first CAS is CARC; subsequent may be RARC
+                    if not current["CARC_Code"]:
+                        current["CARC_Code"] = code
+                    elif not current["RARC_Code"]:
+                        current["RARC_Code"] = code
+            elif tag == "SVC" and current:
+                # SVC*HC:<CPT>...
+                if len(parts) > 1 and parts[1].startswith("HC:"):
+                    if not current["CPT_Code"]:
+                        current["CPT_Code"] = parts[1][3:].partition(":")[0]
+            elif tag == "DTM" and current:
+                # record denial date from common qualifiers
+                if len(parts) >= 3 and parts[1] in DENIAL_DATE_QUALIFIERS:
+                    current["Denial_Date"] = parts[2]
     if current:
         results.append(current)
     return results
 
 
-def ingest_835_directory(conn, root_dir):
-    """Walk subdirectories and insert parsed claims into database."""
-    cursor = conn.cursor()
+def ingest_835_directory(conn, root_dir, workers=1):
+    """Walk subdirectories and insert parsed claims into database.
+
+    With ``workers`` > 1 the files are parsed in a process pool.  Rows are
+    still inserted from this process in walk order, so INSERT OR REPLACE
+    resolves duplicate claim IDs exactly as the serial path does.
+    """
+    paths = []
+    practice_types = []
     for subdir, dirs, files in os.walk(root_dir):
         practice_type = os.path.basename(subdir)
         for fname in files:
             if not fname.lower().endswith(".edi"):
                 continue
-            path = os.path.join(subdir, fname)
-            denials = parse_835_file(path, practice_type)
-            for d in denials:
-                # insert or replace
-                cols = ",".join(d.keys())
-                placeholders = ",".join("?" for _ in d)
-                vals = tuple(d.values())
-                cursor.execute(
-                    f"INSERT OR REPLACE INTO Claims_Denials ({cols}) VALUES ({placeholders})",
-                    vals,
-                )
+            paths.append(os.path.join(subdir, fname))
+            practice_types.append(practice_type)
+
+    cursor = conn.cursor()
+
+    def insert(parsed):
+        # parsed files are flattened lazily into executemany, so only the
+        # claims of the file currently being inserted are held at once
+        rows = map(_claim_values, itertools.chain.from_iterable(parsed))
+        cursor.executemany(INSERT_CLAIM_SQL, rows)
+
+    if workers > 1 and len(paths) > 1:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            insert(pool.map(parse_835_file, paths, practice_types, chunksize=chunksize))
+    else:
+        insert(map(parse_835_file, paths, practice_types))
     conn.commit()
 
 
@@ -231,6 +290,12 @@ def main():
         default=os.path.join(os.path.dirname(__file__), "denials_engine.db"),
         help="SQLite database path (default: denials_engine.db in scripts directory)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse 835 files (default: 1, serial)",
+    )
     args = parser.parse_args()
 
     db_path = os.path.abspath(args.db_path)
@@ -252,7 +317,7 @@ def main():
     # ingest 835 files
     if os.path.isdir(args.input_dir):
         print(f"Parsing 835 files under {args.input_dir}...")
-        ingest_835_directory(conn, args.input_dir)
+        ingest_835_directory(conn, args.input_dir, workers=args.workers)
         print("Done ingesting 835 data.")
     else:
         print(f"Input directory not found: {args.input_dir}")
@@ -47,6 +47,24 @@ ACCOUNT_NUMBERS = [
     "6789012345", "7890123456", "8901234567", "9012345678", "0123456789",
 ]
 
+# ============================================================
+# DENIAL PATTERN POOLS
+# ============================================================
+RARC_POOL = ("N362", "N386", "MA130", "N479", "M15", "N95")
+SOFT_DENIAL_CARCS = ("16", "197", "50")
+HARD_DENIAL_CARCS = ("29", "27", "96")
+CODING_DENIAL_CARCS = ("4", "11", "167")
+ELIGIBILITY_DENIAL_CARCS = ("185", "109", "31")
+# (CLP status, CARC, group code) per claim in the mixed file;
+# a None CARC means a partial payment claim
+MIXED_DENIAL_PATTERNS = (
+    ("4", "16", "CO"),     # Soft
+    ("4", "29", "CO"),     # Hard
+    ("1", None, None),     # Partial payment
+    ("4", "4", "CO"),      # Coding
+    ("4", "185", "PI"),    # Eligibility
+)
+
 
 def _pad(val, length):
     """Pad a string value to the specified length with trailing spaces."""
@@ -194,8 +212,7 @@ def _build_svc_line(cpt, modifier, billed, paid, units, service_date,
 def _pick_rarc(seed):
     """Pick a RARC code from the designated pool."""
     random.seed(seed)
-    rarc_pool = ["N362", "N386", "MA130", "N479", "M15", "N95"]
-    return random.choice(rarc_pool)
+    return random.choice(RARC_POOL)
 
 
 def _generate_claims_for_file(practice_type, practice_idx, file_idx, provider, payer):
@@ -264,8 +281,7 @@ def _assign_denial_pattern(file_idx, claim_line, num_claims, selected_cpts,
 
     if file_idx in (0, 1, 2):
         # Soft denials - recoverable
-        carc_choices = ["16", "197", "50"]
-        carc = carc_choices[file_idx % 3]
+        carc = SOFT_DENIAL_CARCS[file_idx % 3]
         clp_status = "4"  # Denied
         return _build_denied_claim(
             clp_status, carc, "CO", selected_cpts, seed,
@@ -275,8 +291,7 @@ def _assign_denial_pattern(file_idx, claim_line, num_claims, selected_cpts,
 
     elif file_idx in (3, 4):
         # Hard denials
-        carc_choices = ["29", "27", "96"]
-        carc = carc_choices[(file_idx + claim_line) % 3]
+        carc = HARD_DENIAL_CARCS[(file_idx + claim_line) % 3]
         clp_status = "4"
         return _build_denied_claim(
             clp_status, carc, "CO", selected_cpts, seed,
@@ -293,8 +308,7 @@ def _assign_denial_pattern(file_idx, claim_line, num_claims, selected_cpts,
 
     elif file_idx in (7, 8):
         # Coding denials
-        carc_choices = ["4", "11", "167"]
-        carc = carc_choices[(file_idx + claim_line) % 3]
+        carc = CODING_DENIAL_CARCS[(file_idx + claim_line) % 3]
         clp_status = "4"
         return _build_denied_claim(
             clp_status, carc, "CO", selected_cpts, seed,
@@ -304,8 +318,7 @@ def _assign_denial_pattern(file_idx, claim_line, num_claims, selected_cpts,
 
     elif file_idx in (9, 10):
         # Eligibility denials
-        carc_choices = ["185", "109", "31"]
-        carc = carc_choices[(file_idx + claim_line) % 3]
+        carc = ELIGIBILITY_DENIAL_CARCS[(file_idx + claim_line) % 3]
         clp_status = "4"
         group = "PI" if carc == "185" else "OA"
         return _build_denied_claim(
@@ -316,14 +329,7 @@ def _assign_denial_pattern(file_idx, claim_line, num_claims, selected_cpts,
 
     else:
         # File 12 (index 11): Mix of all denial types
-        mixed_patterns = [
-            ("4", "16", "CO"),     # Soft
-            ("4", "29", "CO"),     # Hard
-            ("1", None, None),     # Partial payment
-            ("4", "4", "CO"),      # Coding
-            ("4", "185", "PI"),    # Eligibility
-        ]
-        pattern = mixed_patterns[claim_line % len(mixed_patterns)]
+        pattern = MIXED_DENIAL_PATTERNS[claim_line % len(MIXED_DENIAL_PATTERNS)]
         if pattern[1] is None:
             return _build_partial_payment_claim(
                 selected_cpts, seed, plan_type_code, claim_id, payer_claim_id,
@@ -253,6 +253,9 @@ def build_mixed_claim(claim_id, patient, provider, payer, cpt_tuple, icd_tuple,
 
     For mixed files, some claims are fully denied, others are partially paid with
     both CO/OA denial adjustments and PR patient responsibility adjustments.
+
+    Returns (segments, paid_amount) so the caller can total the BPR payment
+    without parsing it back out of the CLP segment.
     """
     cpt_code, cpt_desc, billed_amount = cpt_tuple
     icd_code, icd_desc = icd_tuple
@@ -342,7 +345,7 @@ def build_mixed_claim(claim_id, patient, provider, payer, cpt_tuple, icd_tuple,
     # LQ*HE - RARC remark
     segments.append(f"LQ*HE*{rarc}~")
 
-    return segments
+    return segments, paid_amount
 
 
 # ============================================================
@@ -361,8 +364,8 @@ def generate_frontend_registration_file(practice_type, practice_idx, file_idx, f
     # Pick 2-3 claims per file
     num_claims = random.choice([2, 3])
     payment_date = get_random_date(90, 5, seed=seed_base + 4)
-    payment_date_str = format_date_edi(payment_date)
     interchange_date, interchange_time = format_datetime_edi(payment_date)
+    payment_date_str = interchange_date
 
     isa_control = f"{practice_idx:03d}{file_idx:06d}"
     gs_control = f"{practice_idx}{file_idx:04d}"
@@ -379,6 +382,7 @@ def generate_frontend_registration_file(practice_type, practice_idx, file_idx, f
         payer['payer_id'], provider['npi'],
         interchange_date, interchange_time, gs_control
     ))
+    st_idx = len(segments)
     segments.append(build_st_segment(tx_control))
 
     # BPR - $0 payment for denials
@@ -416,7 +420,6 @@ def generate_frontend_registration_file(practice_type, practice_idx, file_idx, f
         ))
 
     # Count segments between ST and SE (inclusive)
-    st_idx = next(i for i, s in enumerate(segments) if s.startswith("ST*"))
     seg_count = len(segments) - st_idx + 1  # +1 for SE itself
 
     segments.append(build_se_segment(seg_count, tx_control))
@@ -437,8 +440,8 @@ def generate_coding_documentation_file(practice_type, practice_idx, file_idx, fi
 
     num_claims = random.choice([2, 3, 3])
     payment_date = get_random_date(90, 5, seed=seed_base + 4)
-    payment_date_str = format_date_edi(payment_date)
     interchange_date, interchange_time = format_datetime_edi(payment_date)
+    payment_date_str = interchange_date
 
     isa_control = f"{practice_idx:03d}{file_idx:06d}"
     gs_control = f"{practice_idx}{file_idx:04d}"
@@ -454,6 +457,7 @@ def generate_coding_documentation_file(practice_type, practice_idx, file_idx, fi
         payer['payer_id'], provider['npi'],
         interchange_date, interchange_time, gs_control
     ))
+    st_idx = len(segments)
     segments.append(build_st_segment(tx_control))
     segments.append(build_bpr_segment(0.00, payment_date_str))
 
@@ -480,7 +484,6 @@ def generate_coding_documentation_file(practice_type, practice_idx, file_idx, fi
             svc_date, payer_ref
         ))
 
-    st_idx = next(i for i, s in enumerate(segments) if s.startswith("ST*"))
     seg_count = len(segments) - st_idx + 1
     segments.append(build_se_segment(seg_count, tx_control))
     segments.append(build_ge_segment(1, gs_control))
@@ -500,8 +503,8 @@ def generate_auth_precert_file(practice_type, practice_idx, file_idx, file_sub):
 
     num_claims = random.choice([2, 3])
     payment_date = get_random_date(90, 5, seed=seed_base + 4)
-    payment_date_str = format_date_edi(payment_date)
     interchange_date, interchange_time = format_datetime_edi(payment_date)
+    payment_date_str = interchange_date
 
     isa_control = f"{practice_idx:03d}{file_idx:06d}"
     gs_control = f"{practice_idx}{file_idx:04d}"
@@ -517,6 +520,7 @@ def generate_auth_precert_file(practice_type, practice_idx, file_idx, file_sub):
         payer['payer_id'], provider['npi'],
         interchange_date, interchange_time, gs_control
     ))
+    st_idx = len(segments)
     segments.append(build_st_segment(tx_control))
     segments.append(build_bpr_segment(0.00, payment_date_str))
 
@@ -543,7 +547,6 @@ def generate_auth_precert_file(practice_type, practice_idx, file_idx, file_sub):
             svc_date, payer_ref
         ))
 
-    st_idx = next(i for i, s in enumerate(segments) if s.startswith("ST*"))
     seg_count = len(segments) - st_idx + 1
     segments.append(build_se_segment(seg_count, tx_control))
     segments.append(build_ge_segment(1, gs_control))
@@ -563,8 +566,8 @@ def generate_payer_driven_file(practice_type, practice_idx, file_idx, file_sub):
 
     num_claims = random.choice([2, 3])
     payment_date = get_random_date(90, 5, seed=seed_base + 4)
-    payment_date_str = format_date_edi(payment_date)
     interchange_date, interchange_time = format_datetime_edi(payment_date)
+    payment_date_str = interchange_date
 
     isa_control = f"{practice_idx:03d}{file_idx:06d}"
     gs_control = f"{practice_idx}{file_idx:04d}"
@@ -580,6 +583,7 @@ def generate_payer_driven_file(practice_type, practice_idx, file_idx, file_sub):
         payer['payer_id'], provider['npi'],
         interchange_date, interchange_time, gs_control
     ))
+    st_idx = len(segments)
     segments.append(build_st_segment(tx_control))
     segments.append(build_bpr_segment(0.00, payment_date_str))
 
@@ -606,7 +610,6 @@ def generate_payer_driven_file(practice_type, practice_idx, file_idx, file_sub):
             svc_date, payer_ref
         ))
 
-    st_idx = next(i for i, s in enumerate(segments) if s.startswith("ST*"))
     seg_count = len(segments) - st_idx + 1
     segments.append(build_se_segment(seg_count, tx_control))
     segments.append(build_ge_segment(1, gs_control))
@@ -631,8 +634,8 @@ def generate_mixed_complex_file(practice_type, practice_idx, file_idx, file_sub)
     # 4-6 claims per mixed file
     num_claims = random.choice([4, 5, 5, 6])
     payment_date = get_random_date(90, 5, seed=seed_base + 4)
-    payment_date_str = format_date_edi(payment_date)
     interchange_date, interchange_time = format_datetime_edi(payment_date)
+    payment_date_str = interchange_date
 
     isa_control = f"{practice_idx:03d}{file_idx:06d}"
     gs_control = f"{practice_idx}{file_idx:04d}"
@@ -660,6 +663,7 @@ def generate_mixed_complex_file(practice_type, practice_idx, file_idx, file_sub)
         payer['payer_id'], provider['npi'],
         interchange_date, interchange_time, gs_control
     ))
+    st_idx = len(segments)
     segments.append(build_st_segment(tx_control))
 
     # Placeholder for BPR - we will update after generating claims
@@ -700,19 +704,12 @@ def generate_mixed_complex_file(practice_type, practice_idx, file_idx, file_sub)
             else:
                 pr_amount = 0.00
 
-        claim_segments = build_mixed_claim(
+        claim_segments, paid = build_mixed_claim(
             claim_id, patient, provider, payer, cpt, icd,
             denial_carc, denial_group, pr_carc, pr_amount, rarc,
             svc_date, payer_ref, is_partial_pay=is_partial
         )
-
-        # Extract paid amount from CLP segment for BPR total
-        for seg in claim_segments:
-            if seg.startswith("CLP*"):
-                parts = seg.rstrip("~").split("*")
-                paid = float(parts[4])
-                total_paid += paid
-                break
+        total_paid += paid
 
         segments.extend(claim_segments)
 
@@ -722,7 +719,6 @@ def generate_mixed_complex_file(practice_type, practice_idx, file_idx, file_sub)
     else:
         segments[bpr_idx] = build_bpr_segment(0.00, payment_date_str)
 
-    st_idx = next(i for i, s in enumerate(segments) if s.startswith("ST*"))
     seg_count = len(segments) - st_idx + 1
     segments.append(build_se_segment(seg_count, tx_control))
     segments.append(build_ge_segment(1, gs_control))
@@ -755,6 +751,35 @@ FILE_CATEGORY_MAP = {
 # MAIN
 # ============================================================
 
+def _generate_practice_files(practice_idx, practice_type):
+    """Write all categorization files for one practice type; returns (count, errors)."""
+    practice_dir = os.path.join(BASE_OUTPUT_DIR, practice_type)
+    os.makedirs(practice_dir, exist_ok=True)
+
+    practice_files = 0
+    errors = []
+    for file_sub in range(FILES_PER_PRACTICE):
+        file_idx = file_sub + 1  # 1-based file index for naming
+        filename = f"835_cat_{practice_type}_{file_idx:03d}.edi"
+        filepath = os.path.join(practice_dir, filename)
+
+        try:
+            generator_fn = FILE_CATEGORY_MAP[file_sub]
+            content = generator_fn(
+                practice_type, practice_idx, file_idx, file_sub
+            )
+
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(content)
+
+            practice_files += 1
+
+        except Exception as e:
+            errors.append(f"  ERROR generating {filename}: {e}")
+
+    return practice_files, errors
+
+
 def main():
     """Generate all 835 denial categorization test files."""
     total_files = 0
@@ -770,30 +795,11 @@ def main():
     print("=" * 70)
 
     for practice_idx, practice_type in enumerate(PRACTICE_TYPES):
-        practice_dir = os.path.join(BASE_OUTPUT_DIR, practice_type)
-        os.makedirs(practice_dir, exist_ok=True)
-
-        practice_files = 0
-        for file_sub in range(FILES_PER_PRACTICE):
-            file_idx = file_sub + 1  # 1-based file index for naming
-            filename = f"835_cat_{practice_type}_{file_idx:03d}.edi"
-            filepath = os.path.join(practice_dir, filename)
-
-            try:
-                generator_fn = FILE_CATEGORY_MAP[file_sub]
-                content = generator_fn(
-                    practice_type, practice_idx, file_idx, file_sub
-                )
-
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(content)
-
-                practice_files += 1
-                total_files += 1
-
-            except Exception as e:
-                total_errors += 1
-                print(f"  ERROR generating {filename}: {e}")
+        practice_files, errors = _generate_practice_files(practice_idx, practice_type)
+        total_files += practice_files
+        total_errors += len(errors)
+        for message in errors:
+            print(message)
 
         # Determine category breakdown for display
         print(
@@ -765,8 +765,9 @@ def format_datetime_hl7(d):
     return d.strftime("%Y%m%d%H%M%S")
 
 def format_datetime_edi(d):
-    """Format datetime for EDI segments."""
-    return d.strftime("%Y%m%d"), d.strftime("%H%M")
+    """Format datetime for EDI segments: (YYYYMMDD, HHMM)"""
+    stamp = d.strftime("%Y%m%d%H%M")
+    return stamp[:8], stamp[8:]
 
 def random_amount(low, high, seed=None):
     """Generate random dollar amount."""